@@ -7,7 +7,9 @@
 
 def load(fp, delim=';', remove='"\n', keys=0, charset=None):
 	"""
-	Generate dictionary from an open file 'fp'.
+	Generate dictionaries from an open file 'fp', one
+	per line, reading each line only when it's needed.
+	Use list(load(fp)) to get them all at once.
 
 	Arguments:
 	 delim   delimiter between data fields
@@ -16,24 +18,39 @@ def load(fp, delim=';', remove='"\n', keys=0, charset=None):
 	         field captions/dictionary keys
 	 charset charset to decode from.
 	"""
+	remove = "".join(remove)
+	table  = dict.fromkeys(map(ord, remove))
 
-	csv = list(fp)
-	for r in remove:
-		csv = map(lambda s: s.replace(r, ""), csv)
-	
-	if charset:
-		csv = map(lambda s: s.decode(charset), csv)
-
-	csv = map(lambda s: s.split(delim), csv)
+	def rows():
+		for line in fp:
+			if isinstance(line, unicode):
+				line = line.translate(table)
+			elif isinstance(remove, unicode):
+				# str.translate can't delete unicode characters
+				for r in remove:
+					line = line.replace(r, "")
+			else:
+				line = line.translate(None, remove)
+			if charset:
+				line = line.decode(charset)
+			yield line.split(delim)
 
+	csv = rows()
+	before = []
 	if hasattr(keys, "__iter__"):
 		captions = keys[:]
 	elif type(keys) == int:
-		captions = csv[keys]
-		csv = csv[:keys]+csv[keys+1:]
-	
-	csv = [[(captions[i], row[i]) for i in range(len(captions))] for row in csv]
-	return map(dict, csv)
+		for row in csv:
+			if len(before) == keys:
+				captions = row
+				break
+			before.append(row)
+		else:
+			raise IndexError("no row {0} to take keys from".format(keys))
+
+	for part in (before, csv):
+		for row in part:
+			yield dict((captions[i], row[i]) for i in range(len(captions)))
 
 def dump(ds, fp=None, delim=";", fieldnames=True, quotes='"'):
 	"""
@@ -8,30 +8,59 @@
 #
 
 
-import matplotlib.pyplot as plt
-from matplotlib.pyplot import show,\
-     NullFormatter, FormatStrFormatter, \
-     FixedFormatter, NullLocator, \
-     AutoLocator
-from matplotlib.dates import date2num, num2date, \
-     DateFormatter, WeekdayLocator, \
-     MonthLocator, DayLocator, \
-     HourLocator, MinuteLocator, \
-     AutoDateFormatter, AutoDateLocator, \
-     MO, TU, WE, TH, FR, SA, SU
-from scipy import linspace
-from scipy.interpolate import interp1d
+# matplotlib, scipy and numpy are imported where they are
+# needed, reading and aggregating doesn't wait for them.
 from datetime import datetime, timedelta
+from itertools import groupby, islice
+from functools import partial
+from bisect import bisect_left, bisect_right, insort
+from time import sleep, time
+from heapq import merge
+import os
+import mmap
+import struct
+import zlib
+import math
 
 
 DATE_FORMAT = "%y/%m/%d"
 DATETIME_FORMAT = "%y/%m/%d %H:%M"
 
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# two-digit fields and %y years by their text, see parser()
+DIGITS = dict(("%02d" % i, i) for i in range(100))
+YEARS  = dict(("%02d" % i, i + (2000 if i < 69 else 1900)) for i in range(100))
+
+EPOCH = datetime(1970, 1, 1)
+
+# sidecar cache of parsed dates, see readepochs()
+CACHE_SUFFIX = ".epochs"
+CACHE_MAGIC  = "pluto\x00\x00\x01"
+CACHE_HEADER = struct.Struct("<8sqqdqi64s") # magic, offset, size, mtime, count, crc, fmt
+CACHE_DATA   = 128                          # where the int64 epochs start
+
+# compact binary files of epochs, see write() and readbinary()
+BINARY_MAGIC  = "pluto\x00\x00\x02"
+BINARY_HEADER = struct.Struct("<8sq")       # magic, count
+BINARY_DATA   = 16                          # where the int64 epochs start
+
+# numpy.datetime64 units from fine to coarse, see Rollup
+UNITS = ["s", "m", "h", "D", "W", "M", "Y"]
+
 now   = datetime.now
 today = now
 yesterday = lambda: today() - timedelta(days=1)
 tomorrow  = lambda: today() + timedelta(days=1)
 
+def isarray(seq):
+	"""
+	tells numpy arrays from other sequences. arrays of dates
+	hold seconds since EPOCH instead of datetime objects,
+	see read(..., epochs=True). numpy scalars are no arrays.
+	"""
+	return getattr(seq, "ndim", 0) > 0
+
 def argslist(arg, *args):
 	"""
 	returns a combined list of arguments.
@@ -42,7 +71,7 @@ def argslist(arg, *args):
 	>>> argslist([0, 1], 2, [3])
 	[0, 1, 2, [3]]
 	"""
-	if type(arg) in (list, tuple):
+	if isinstance(arg, (list, tuple)) or isarray(arg):
 		arg = list(arg)
 		arg.extend(args)
 		return arg
@@ -56,6 +85,19 @@ def to_seconds(delta):
 	""" timedelta(...) -> int seconds """
 	return delta.seconds + delta.days*24*60*60
 
+def to_epoch(date):
+	""" datetime(...) -> int seconds since EPOCH """
+	return to_seconds(date - EPOCH)
+
+def from_epoch(seconds):
+	""" int seconds since EPOCH -> datetime(...) """
+	return datetime.utcfromtimestamp(seconds)
+
+def epoch2num(seq):
+	""" array of seconds since EPOCH -> array of matplotlib dates """
+	from matplotlib.dates import date2num
+	return seq / 86400. + date2num(EPOCH)
+
 def to_minutes(delta):
 	""" timedelta(...) -> float minutes """
 	return to_seconds(delta)/60.
@@ -68,6 +110,16 @@ def to_days(delta):
 	""" timedelta(...) -> float days """
 	return to_hours(delta)/24.
 
+# the same for arrays of seconds, see meantime()
+to_seconds.seconds = lambda s: s
+to_minutes.seconds = lambda s: s/60.
+to_hours.seconds   = lambda s: s/60./60.
+to_days.seconds    = lambda s: s/60./60./24.
+
+def minutes(n):
+	""" returns timedelta(minutes=n) instance """
+	return timedelta(minutes=n)
+
 def hours(n):
 	""" returns timedelta(hours=n) instance """
 	return timedelta(hours=n)
@@ -129,11 +181,18 @@ def average(arg, *args):
 	args = argslist(arg, *args)
 	return min(args) + distance(args)/2
 
+# first(), last() and average() of sorted values only depend on
+# the first and last one. given those as arrays, epoch arrays are
+# reduced bucket-wise in one go, see count() and meantime().
+first.ends   = lambda lo, hi: lo
+last.ends    = lambda lo, hi: hi
+average.ends = lambda lo, hi: lo + (hi-lo)//2
+
 def median(arg, *args):
 	"""
 	returns the median of n values or a sequence.
 	"""
-	data = sorted(seq)
+	data = sorted(argslist(arg, *args))
 	n = len(data)
 	m = n/2
 	if n%2 == 0:
@@ -141,11 +200,161 @@ def median(arg, *args):
 	else:
 		return data[m]
 
+class Digest(object):
+	"""
+	a t-digest (Ted Dunning), which summarizes a stream of
+	numbers or dates in about 'compression' centroids and
+	estimates its quantiles from them. digests of parts of
+	the stream can be merged, see merge().
+	"""
+	def __init__(self, compression=100, values=()):
+		self.compression = compression
+		self.means, self.weights, self.buffer = [], [], []
+		self.count = 0
+		self.min = self.max = None
+		self.dates = None
+		self.update(values)
+
+	def add(self, value, weight=1):
+		""" adds 'value' with 'weight' to the digest """
+		if self.dates is None:
+			self.dates = isinstance(value, datetime)
+		if self.dates:
+			value = (value - EPOCH).total_seconds()
+		self.buffer.append((value, weight))
+		self.count += weight
+		self.min = value if self.min is None else min(self.min, value)
+		self.max = value if self.max is None else max(self.max, value)
+		if len(self.buffer) >= 5*self.compression:
+			self.compress()
+
+	def update(self, values):
+		""" adds each of 'values' """
+		for value in values:
+			self.add(value)
+
+	def merge(self, other):
+		""" adds the centroids of another digest """
+		other.compress()
+		if other.count == 0:
+			return
+		if self.dates is None:
+			self.dates = other.dates
+		self.buffer.extend(zip(other.means, other.weights))
+		self.count += other.count
+		self.min = other.min if self.min is None else min(self.min, other.min)
+		self.max = other.max if self.max is None else max(self.max, other.max)
+		self.compress()
+
+	def scale(self, q):
+		""" maps quantile 'q' to the digest's scale, k1 """
+		return self.compression / (2*math.pi) * math.asin(2*min(1., q) - 1)
+
+	def compress(self):
+		""" merges buffered values into the centroids """
+		if len(self.buffer) == 0:
+			return
+		points = sorted(zip(self.means, self.weights) + self.buffer)
+		total = float(self.count)
+		means, weights, cum = [], [], 0
+		mean, weight = points[0]
+		for m, w in points[1:]:
+			if self.scale((cum + weight + w) / total) - self.scale(cum / total) <= 1:
+				weight += w
+				mean += (m - mean) * w / float(weight)
+			else:
+				means.append(mean)
+				weights.append(weight)
+				cum += weight
+				mean, weight = m, w
+		means.append(mean)
+		weights.append(weight)
+		self.means, self.weights, self.buffer = means, weights, []
+
+	def quantile(self, q):
+		""" estimates the 'q' quantile (0..1) """
+		self.compress()
+		if self.count == 0:
+			raise ValueError("empty digest")
+
+		centers, cum = [], 0
+		for w in self.weights:
+			centers.append(cum + w/2.)
+			cum += w
+
+		target = q * self.count
+		if target <= centers[0]:
+			lo, hi, a, b = self.min, self.means[0], 0, centers[0]
+		elif target >= centers[-1]:
+			lo, hi, a, b = self.means[-1], self.max, centers[-1], self.count
+		else:
+			i = bisect_right(centers, target)
+			lo, hi, a, b = self.means[i-1], self.means[i], centers[i-1], centers[i]
+		value = lo + (hi - lo) * (target - a) / (b - a) if b > a else lo
+
+		if self.dates:
+			return EPOCH + timedelta(seconds=value)
+		return value
+
+def digest(arg, *args):
+	"""
+	returns a Digest of n values or a sequence. as 'which' or
+	'yreduce' it keeps mergeable summaries per bucket, e.g. 
+	from parallel workers.
+	"""
+	return Digest(values=argslist(arg, *args))
+
+class quantile(object):
+	"""
+	a function which estimates the 'q' quantile (0..1)
+	of n values or a sequence using a Digest, to be used like
+	median(). unlike a closure it can be pickled, e.g. for
+	separately(..., processes=n).
+	"""
+	def __init__(self, q, compression=100):
+		self.q = q
+		self.compression = compression
+
+	def __call__(self, arg, *args):
+		return Digest(self.compression, argslist(arg, *args)).quantile(self.q)
+
+p50 = quantile(.50)
+p95 = quantile(.95)
+p99 = quantile(.99)
+
+class TimeSeries(list):
+	"""
+	a sorted list of datetime objects.
+
+	pick(), around() and the match functions find their
+	range in a TimeSeries by bisection instead of filtering
+	the whole sequence, and return a TimeSeries again.
+	"""
+	def __init__(self, seq=(), presorted=False):
+		list.__init__(self, seq)
+		if not presorted:
+			self.sort()
+
+	def between(self, start, end, inclusive=True):
+		"""
+		returns the dates from 'start' up to 'end',
+		'end' is left out unless 'inclusive'.
+		"""
+		lo = bisect_left(self, start)
+		hi = (bisect_right if inclusive else bisect_left)(self, end)
+		return TimeSeries(self[lo:hi], presorted=True)
+
+	def add(self, date):
+		""" inserts 'date', keeping the series sorted """
+		insort(self, date)
+
 def matchyear(seq, date):
 	"""
 	returns datetime objects from 'seq'
 	for which 'date' matches up to the year.
 	"""
+	if isinstance(seq, TimeSeries):
+		return seq.between(*matchyear.span(date), inclusive=False)
 	match = lambda d: d.year == date.year
 	return filter(match, seq)
 
@@ -154,6 +363,8 @@ def matchmonth(seq, date):
 	returns datetime objects from 'seq'
 	for which 'date' matches up to the month.
 	"""
+	if isinstance(seq, TimeSeries):
+		return seq.between(*matchmonth.span(date), inclusive=False)
 	match = lambda d: d.month == date.month
 	return filter(match, matchyear(seq, date))
 
@@ -162,6 +373,8 @@ def matchday(seq, date):
 	returns datetime objects from 'seq'
 	for which 'date' matches up to the day.
 	"""
+	if isinstance(seq, TimeSeries):
+		return seq.between(*matchday.span(date), inclusive=False)
 	match = lambda d: d.day == date.day
 	return filter(match, matchmonth(seq, date))
 
@@ -170,14 +383,41 @@ def matchhour(seq, date):
 	returns datetime objects from 'seq'
 	for which 'date' matches up to the hour.
 	"""
+	if isinstance(seq, TimeSeries):
+		return seq.between(*matchhour.span(date), inclusive=False)
 	match = lambda d: d.hour == date.hour
 	return filter(match, matchday(seq, date))
 
+# group keys for the match functions above. a filter with
+# a 'key' attribute selects contiguous runs of sorted data,
+# which lets buckets() sort them out in a single pass.
+matchyear.key  = lambda d: d.year
+matchmonth.key = lambda d: (d.year, d.month)
+matchday.key   = lambda d: (d.year, d.month, d.day)
+matchhour.key  = lambda d: (d.year, d.month, d.day, d.hour)
+
+# the ranges [start, end) they match, used to bisect a TimeSeries.
+matchyear.span  = lambda d: (datetime(d.year, 1, 1), datetime(d.year+1, 1, 1))
+matchmonth.span = lambda d: (datetime(d.year, d.month, 1),
+                             datetime(d.year + d.month/12, d.month%12 + 1, 1))
+matchday.span   = lambda d: (settime(d), settime(d) + days(1))
+matchhour.span  = lambda d: (settime(d, d.hour), settime(d, d.hour) + hours(1))
+
+# and the numpy.datetime64 units they match, to bucket epoch arrays.
+matchyear.unit  = "Y"
+matchmonth.unit = "M"
+matchday.unit   = "D"
+matchhour.unit  = "h"
+
 def pick(seq, start, end):
 	"""
 	pick a chunk of data from 'seq'
 	which is between 'start' and 'end'.
 	"""
+	if isinstance(seq, TimeSeries):
+		return seq.between(start, end)
+	if isarray(seq):
+		return seq[(seq >= to_epoch(start)) & (seq <= to_epoch(end))]
 	match = lambda d: d >= start and d <= end
 	return filter(match, seq)
 
@@ -192,18 +432,89 @@ def interdates(seq, win=2):
 	"""
 	calculates dates in between for 'seq'.
 	"""
+	import numpy
+	if isarray(seq):
+		return numpy.linspace(seq[0], seq[-1], len(seq)*win)
+	from matplotlib.dates import date2num, num2date
 	x = map(date2num, seq)
-	xn = linspace(x[0], x[-1], len(x)*win)
+	xn = numpy.linspace(x[0], x[-1], len(x)*win)
 	return map(num2date, xn)
 
-def intervalues(x, y, win=2, kind='cubic'):
+def intervalues(x, y, win=2, kind='cubic', start=None, end=None, fit=None):
+	"""
+	interpolates x (dates) and y values, 'win' times as 
+	dense as x, from 'start' to 'end' (defaulting to the 
+	first and last date). 
+
+	the interpolation is fitted piecewise and only where
+	needed. passing an Interpolator of x and y as 'fit'
+	keeps what it fitted for further calls, so zooming
+	into long series doesn't fit them again.
+	"""
+	import numpy
+	fit = fit or Interpolator(x, y, kind)
+	lo = fit.x[0] if start is None else fit.num(start)
+	hi = fit.x[-1] if end is None else fit.num(end)
+	n = fit.x.searchsorted(hi, "right") - fit.x.searchsorted(lo, "left")
+	lo, hi = max(lo, fit.x[0]), min(hi, fit.x[-1])
+	# windows between two samples get their ends at least
+	xnew = numpy.linspace(lo, hi, max(2, n*win) if lo < hi else int(lo == hi))
+	ynew = fit(xnew)
+	if isarray(x):
+		return xnew, ynew
+	from matplotlib.dates import num2date
+	return num2date(xnew), ynew
+
+class Interpolator(object):
 	"""
-	interpolates x (dates) and y values.
+	interpolates x (dates) and y values in blocks of 'block'
+	points, each of which is fitted with interp1d() over its
+	points and 'margin' more on either side when first needed.
+	series up to 'block' points are fitted as a whole.
+
+	x and y are copied, later changes to them are not seen.
+
+	>>> fit = Interpolator(x, y)                       # doctest: +SKIP
+	>>> interpolated(x, y, start=s, end=e, fit=fit)    # doctest: +SKIP
 	"""
-	xnum = map(date2num, x)
-	xnew = interdates(x, win)
-	yfun = interp1d(xnum, y, kind=kind)
-	return xnew, yfun(map(date2num, xnew))
+	def __init__(self, x, y, kind='cubic', block=4096, margin=8):
+		import numpy
+		self.epochs = isarray(x)
+		self.kind = kind
+		self.block = block
+		self.margin = margin
+		self.x = numpy.array(self.num(x), dtype=float)
+		self.y = numpy.array(y, dtype=float)
+		self.fits = {}
+
+	def num(self, x):
+		""" epochs, or matplotlib date numbers of dates 'x' """
+		import numpy
+		if self.epochs:
+			return numpy.asarray(to_epoch(x) if isinstance(x, datetime) else x, dtype=float)
+		from matplotlib.dates import date2num
+		return numpy.asarray(date2num(x), dtype=float)
+
+	def fit(self, i):
+		""" the interpolation of block 'i' """
+		if i not in self.fits:
+			from scipy.interpolate import interp1d
+			lo = max(0, i*self.block - self.margin)
+			hi = min(len(self.x), (i+1)*self.block + 1 + self.margin)
+			self.fits[i] = interp1d(self.x[lo:hi], self.y[lo:hi], kind=self.kind)
+		return self.fits[i]
+
+	def __call__(self, xnew):
+		""" interpolates y at the sorted numbers 'xnew' """
+		import numpy
+		if len(xnew) == 0:
+			return numpy.zeros(0)
+		blocks = (self.x.searchsorted(xnew, "right") - 1).clip(0, len(self.x)-2) // self.block
+		cut = numpy.r_[0, numpy.flatnonzero(numpy.diff(blocks)) + 1, len(xnew)]
+		ynew = numpy.empty(len(xnew))
+		for lo, hi in zip(cut[:-1], cut[1:]):
+			ynew[lo:hi] = self.fit(blocks[lo])(xnew[lo:hi])
+		return ynew
 
 def buckets(seq, filt=matchday):
 	"""
@@ -212,11 +523,27 @@ def buckets(seq, filt=matchday):
 
 	helper functions for 'filt':
 	 matchhour, matchday, matchmonth, matchyear
+
+	if 'filt' has a 'key' attribute (like the helpers do),
+	sorted data is grouped in one pass by that key.
+	any other filter is applied once per bucket.
 	"""
 	if len(seq) == 0:
 		return [[]]
+
+	if isarray(seq):
+		import numpy
+		if hasattr(filt, "unit"):
+			data = numpy.sort(seq)
+			return numpy.split(data, cuts(data, filt))
+		slots = buckets(map(from_epoch, seq.tolist()), filt)
+		return [numpy.array(map(to_epoch, slot), dtype=seq.dtype) for slot in slots]
 	
-	data = sorted(seq)
+	data = seq if isinstance(seq, TimeSeries) else sorted(seq)
+	key = getattr(filt, "key", None)
+	if key is not None:
+		return [list(slot) for k, slot in groupby(data, key)]
+
 	slots = [filt(data, data[0])]
 	
 	if len(data) == 1:
@@ -227,6 +554,64 @@ def buckets(seq, filt=matchday):
 			slots.append(filt(data, datum))
 	return slots
 
+def cuts(seq, filt=matchday):
+	"""
+	returns the positions in the sorted epoch array 'seq'
+	where a new bucket of 'filt' (which needs a 'unit') begins.
+	"""
+	return cutunit(seq, filt.unit)
+
+def cutunit(seq, unit):
+	"""
+	like cuts(), but takes a numpy.datetime64 'unit' directly.
+	"""
+	import numpy
+	keys = seq.astype("<i8").astype("datetime64[s]")
+	keys = keys.astype("datetime64[{0}]".format(unit))
+	return numpy.flatnonzero(keys[1:] != keys[:-1]) + 1
+
+def ibuckets(seq, filt=matchday):
+	"""
+	like buckets(), but returns lists of positions in 'seq'
+	instead of the data itself, so values correlating with 
+	'seq' can be sorted out the same way.
+
+	>>> d = [datetime(2012, 1, 2), datetime(2012, 1, 1), datetime(2012, 1, 2)]
+	>>> ibuckets(d)
+	[[1], [0, 2]]
+	"""
+	if len(seq) == 0:
+		return [[]]
+
+	if isarray(seq):
+		import numpy
+		order = numpy.argsort(seq, kind="mergesort")
+		if hasattr(filt, "unit"):
+			return numpy.split(order, cuts(seq[order], filt))
+		return ibuckets(map(from_epoch, seq.tolist()), filt)
+
+	if isinstance(seq, TimeSeries):
+		order = range(len(seq))
+	else:
+		order = sorted(range(len(seq)), key=seq.__getitem__)
+	key = getattr(filt, "key", None)
+	if key is not None:
+		return [list(slot) for k, slot in groupby(order, lambda i: key(seq[i]))]
+
+	positions = {}
+	for i in order:
+		positions.setdefault(seq[i], []).append(i)
+
+	slots = []
+	for slot in buckets(seq, filt):
+		seen = dict.fromkeys(slot, 0)
+		islot = []
+		for datum in slot:
+			islot.append(positions[datum][seen[datum]])
+			seen[datum] += 1
+		slots.append(islot)
+	return slots
+
 def count(seq, by=matchday, which=average):
 	"""
 	organizes the sequence of dates using the filter
@@ -237,8 +622,22 @@ def count(seq, by=matchday, which=average):
 	 matchhour, matchday, matchmonth, matchyear
 	
 	helper functions for 'which':
-	 median, average, first, last
+	 median, average, first, last, p50, p95, p99, quantile(q)
+
+	'seq' may be a Rollup as well, see there.
 	"""
+	if isinstance(seq, Rollup):
+		return seq.count(by, which)
+	if isarray(seq):
+		import numpy
+		if len(seq) > 0 and hasattr(by, "unit") and hasattr(which, "ends"):
+			data = numpy.sort(seq)
+			lo = numpy.r_[0, cuts(data, by)]
+			hi = numpy.r_[lo[1:], len(data)] - 1
+			return which.ends(data[lo], data[hi]), hi-lo+1
+		c = buckets(seq, by)
+		return (numpy.array([which(data) for data in c]), numpy.array(map(len, c)))
+
 	c = buckets(seq, by)
 	return ([which(data) for data in c], [len(data) for data in c])
 
@@ -260,7 +659,21 @@ def meantime(seq, conv=to_minutes, which=average, interval=1, offset=0):
 
 	helper functions for 'conv':
 	 to_seconds, to_minutes, to_hours, to_days
+
+	epoch arrays give arrays of dates and values.
 	"""
+	if isarray(seq):
+		return epochmeantime(seq, conv, which, interval, offset)
+
+	if len(seq) > 1 and hasattr(which, "ends") and hasattr(conv, "seconds") \
+	   and isinstance(seq[0], datetime) and seq[0].tzinfo is None:
+		# the same on microseconds since EPOCH, in one go
+		import numpy
+		us = ((d - EPOCH).total_seconds() for d in seq)
+		us = numpy.rint(numpy.fromiter(us, float, len(seq)) * 10**6).astype("<i8")
+		date, dur = epochmeantime(us, conv, which, interval, offset, unit=10**6)
+		return date.astype("datetime64[us]").astype(object).tolist(), dur.tolist()
+
 	date = []
 	dur = []
 	if len(seq) == 1:
@@ -271,6 +684,28 @@ def meantime(seq, conv=to_minutes, which=average, interval=1, offset=0):
 		dur.append(conv(two-one))
 	return (date, dur)
 
+def epochmeantime(seq, conv=to_minutes, which=average, interval=1, offset=0, unit=1):
+	"""
+	meantime() for an array of epoch seconds, or of 
+	'unit' fractions of a second since EPOCH.
+	"""
+	import numpy
+	if len(seq) == 1:
+		return seq[:1], numpy.zeros(1, dtype=int)
+	one = seq[offset:len(seq)-1:interval]
+	two = seq[offset+1::interval]
+	delta = two-one if unit == 1 else (two-one)//unit
+
+	if hasattr(which, "ends"):
+		date = which.ends(one, two)
+	else:
+		date = numpy.array(map(which, one.tolist(), two.tolist()), dtype=seq.dtype)
+	if hasattr(conv, "seconds"):
+		dur = conv.seconds(delta)
+	else:
+		dur = numpy.array([conv(timedelta(seconds=s)) for s in delta.tolist()])
+	return date, dur
+
 def duration(seq, conv=to_minutes, which=average, offset=0):
 	"""
 	calculates the duration between	pairs of dates in 'seq'.
@@ -285,6 +720,68 @@ def duration(seq, conv=to_minutes, which=average, offset=0):
 	"""
 	return meantime(seq, conv, which, offset=offset, interval=2)
 
+def gaps(seq, gap=minutes(30)):
+	"""
+	returns the positions in the sorted dates 'seq' which
+	follow a gap longer than 'gap', where sessions begin.
+	"""
+	import numpy
+	if not isarray(seq):
+		seq = numpy.array(map(to_epoch, seq), dtype="<i8")
+	return numpy.flatnonzero(numpy.diff(seq) > to_seconds(gap)) + 1
+
+def sessions(seq, gap=minutes(30), conv=to_minutes):
+	"""
+	splits the sorted dates 'seq' into sessions wherever 
+	two dates are more than 'gap' apart. 
+	returns the start, end, duration (converted by 'conv') 
+	and number of dates of each session, so
+
+	 plot(*sessions(seq)[::2])
+
+	plots the duration of sessions over their start. 
+	unlike duration(), a missing date costs no more than 
+	the session it belongs to.
+
+	helper functions for 'conv':
+	 to_seconds, to_minutes, to_hours, to_days
+
+	>>> d = [datetime(2012, 1, 1, 8), datetime(2012, 1, 1, 8, 20), datetime(2012, 1, 1, 12)]
+	>>> sessions(d)
+	([datetime.datetime(2012, 1, 1, 8, 0), datetime.datetime(2012, 1, 1, 12, 0)], [datetime.datetime(2012, 1, 1, 8, 20), datetime.datetime(2012, 1, 1, 12, 0)], [20.0, 0.0], [2, 1])
+	"""
+	if isarray(seq):
+		return epochsessions(seq, gap, conv)
+	if len(seq) == 0:
+		return [], [], [], []
+
+	# on microseconds since EPOCH, like meantime()
+	import numpy
+	us = ((d - EPOCH).total_seconds() for d in seq)
+	us = numpy.rint(numpy.fromiter(us, float, len(seq)) * 10**6).astype("<i8")
+	start, end, dur, n = epochsessions(us, gap, conv, unit=10**6)
+	dates = lambda a: a.astype("datetime64[us]").astype(object).tolist()
+	return dates(start), dates(end), dur.tolist(), n.tolist()
+
+def epochsessions(seq, gap=minutes(30), conv=to_minutes, unit=1):
+	"""
+	sessions() for an array of epoch seconds, or of 
+	'unit' fractions of a second since EPOCH.
+	"""
+	import numpy
+	lo = numpy.r_[0, numpy.flatnonzero(numpy.diff(seq) > to_seconds(gap)*unit) + 1]
+	hi = numpy.r_[lo[1:], len(seq)] - 1
+	if len(seq) == 0:
+		lo = hi = lo[:0]
+	start, end = seq[lo], seq[hi]
+	delta = end-start if unit == 1 else (end-start)//unit
+
+	if hasattr(conv, "seconds"):
+		dur = conv.seconds(delta)
+	else:
+		dur = numpy.array([conv(timedelta(seconds=s)) for s in delta.tolist()])
+	return start, end, dur, hi-lo+1
+
 def combined(what, seq, filt=matchday, xreduce=average, yreduce=average, **kwargs):
 	"""
 	'what' is applied to the whole dataset 'seq'
@@ -300,15 +797,26 @@ def combined(what, seq, filt=matchday, xreduce=average, yreduce=average, **kwarg
 	 matchhour, matchday, matchmonth, matchyear
 	
 	helper functions for 'which':
-	 average, median, first, last
+	 average, median, first, last, p50, p95, p99, quantile(q)
 	"""
 	x, y = what(seq, **kwargs)
-	slots = buckets(x, filt)
-	xnew = [xreduce(date) for date in slots]
-	ynew = [yreduce([y[x.index(datum)] for datum in slot]) for slot in slots]
+	slots = ibuckets(x, filt)
+
+	if isarray(x):
+		import numpy
+		y = numpy.asarray(y)
+		if hasattr(xreduce, "ends") and len(x) > 0:
+			xnew = xreduce.ends(x[[s[0] for s in slots]], x[[s[-1] for s in slots]])
+		else:
+			xnew = numpy.array([xreduce(x[slot]) for slot in slots])
+		return xnew, numpy.array([yreduce(y[slot]) for slot in slots])
+
+	xnew = [xreduce([x[i] for i in slot]) for slot in slots]
+	ynew = [yreduce([y[i] for i in slot]) for slot in slots]
 	return xnew, ynew
 
-def separately(what, seq, filt=matchday, xreduce=average, yreduce=average, **kwargs):
+def separately(what, seq, filt=matchday, xreduce=average, yreduce=average, 
+               processes=1, chunksize=None, **kwargs):
 	"""
 	'seq' is first sorted into separate lists using
 	'filt'. the function 'what' is applied (passing **kwargs)
@@ -325,20 +833,291 @@ def separately(what, seq, filt=matchday, xreduce=average, yreduce=average, **kwa
 	and later reducing it to averages per day would
 	give a slightly different result (which could be
 	wanted, though).
+
+	'processes' other than 1 spreads the buckets over a
+	pool of that many processes (None: one per cpu), handed
+	out 'chunksize' buckets at a time. 'what', the reducers
+	and **kwargs need to be picklable then, i.e. defined at
+	module level. the results are the same either way.
 	"""
 	data = buckets(seq, filt=filt)
-	results = map(lambda x: what(x, **kwargs), data)
-	x = [xreduce(r[0]) for r in results]
-	y = [yreduce(r[1]) for r in results]
+	reduced = partial(reduceone, what, xreduce, yreduce, kwargs)
+	if processes == 1:
+		results = map(reduced, data)
+	else:
+		from multiprocessing import Pool
+		pool = Pool(processes)
+		try:
+			results = pool.map(reduced, data, chunksize)
+		finally:
+			pool.close()
+			pool.join()
+
+	x = [r[0] for r in results]
+	y = [r[1] for r in results]
+	if isarray(seq):
+		import numpy
+		return numpy.array(x), numpy.array(y)
 	return x, y
+
+def reduceone(what, xreduce, yreduce, kwargs, data):
+	"""
+	applies 'what' to a bucket for separately() and
+	returns the reduced x and y.
+	"""
+	x, y = what(data, **kwargs)
+	return xreduce(x), yreduce(y)
 	
+def windows(seq, width=minutes(15), step=minutes(1), start=None, end=None):
+	"""
+	slides a window 'width' wide over the sorted dates 'seq' 
+	in steps of 'step', from 'start' to 'end' (defaulting to
+	the first and last date). 
+
+	returns the end of each window and the positions of the 
+	first date in it and the first date after it. windows
+	include their end, but not their start.
+	"""
+	if isarray(seq):
+		import numpy
+		start = seq[0] if start is None else to_epoch(start)
+		end = seq[-1] if end is None else to_epoch(end)
+		x = numpy.arange(start, end+1, to_seconds(step), dtype=seq.dtype)
+		lo = seq.searchsorted(x - to_seconds(width), "right")
+		hi = seq.searchsorted(x, "right")
+		return x, lo, hi
+
+	start = start or seq[0]
+	end = end or seq[-1]
+	x, lo, hi = [], [], []
+	i = j = 0
+	while start <= end:
+		while j < len(seq) and seq[j] <= start:
+			j += 1
+		while i < j and seq[i] <= start - width:
+			i += 1
+		x.append(start)
+		lo.append(i)
+		hi.append(j)
+		start += step
+	return x, lo, hi
+
+def rollcount(seq, width=minutes(15), step=minutes(1), start=None, end=None):
+	"""
+	counts the dates of 'seq' in a sliding window, 
+	see windows() for the arguments.
+	returns the window ends and the counts.
+	"""
+	x, lo, hi = windows(seq, width, step, start, end)
+	if isarray(seq):
+		return x, hi-lo
+	return x, [j-i for i, j in zip(lo, hi)]
+
+def rollrate(seq, width=minutes(15), step=minutes(1), conv=to_minutes, start=None, end=None):
+	"""
+	like rollcount(), but returns the number of dates per
+	unit of 'conv' (e.g. per minute).
+	"""
+	x, n = rollcount(seq, width, step, start, end)
+	per = float(conv(width))
+	if isarray(seq):
+		return x, n / per
+	return x, [c / per for c in n]
+
+def rollmeantime(seq, width=minutes(15), step=minutes(1), conv=to_minutes, start=None, end=None):
+	"""
+	like rollcount(), but returns the mean time between
+	consecutive dates inside each window, converted by 'conv',
+	or 0 for windows with less than two dates.
+	"""
+	x, lo, hi = windows(seq, width, step, start, end)
+	if isarray(seq):
+		import numpy
+		n = hi-lo
+		span = seq[(hi-1).clip(0)] - seq[lo.clip(0, len(seq)-1)]
+		mean = span / (n-1).clip(1).astype(float)
+		if hasattr(conv, "seconds"):
+			mean = conv.seconds(mean)
+		else:
+			mean = numpy.array([conv(timedelta(seconds=m)) for m in mean.tolist()])
+		return x, numpy.where(n > 1, mean, 0)
+
+	y = []
+	for i, j in zip(lo, hi):
+		if j-i < 2:
+			y.append(0)
+			continue
+		mean = to_seconds(seq[j-1] - seq[i]) / float(j-i-1)
+		if hasattr(conv, "seconds"):
+			y.append(conv.seconds(mean))
+		else:
+			y.append(conv(timedelta(seconds=mean)))
+	return x, y
+
+def weekhours(seq):
+	"""
+	counts dates from 'seq' per weekday and hour of the day.
+	returns a 7x24 numpy array, rows starting with monday.
+	"""
+	import numpy
+	if isarray(seq):
+		days, seconds = numpy.divmod(seq.astype("<i8"), 86400)
+		bins = (days + 3) % 7 * 24 + seconds // 3600  # EPOCH was a thursday
+	else:
+		bins = [d.weekday()*24 + d.hour for d in seq]
+	return numpy.bincount(bins, minlength=7*24).reshape(7, 24)
+
+def dayminutes(seq):
+	"""
+	counts dates from 'seq' per day and minute of the day.
+	returns the first day and a numpy array with a row of
+	1440 minutes for each day from there to the last date.
+	"""
+	import numpy
+	if isarray(seq):
+		days, seconds = numpy.divmod(seq.astype("<i8"), 86400)
+		first = days.min()
+		bins = (days - first) * 1440 + seconds // 60
+		first = from_epoch(int(first) * 86400)
+	else:
+		first = settime(min(seq))
+		bins = [(d - first).days*1440 + d.hour*60 + d.minute for d in seq]
+	counts = numpy.bincount(bins)
+	counts.resize(-(-len(counts) // 1440) * 1440)
+	return first, counts.reshape(-1, 1440)
+
+class Rollup(object):
+	"""
+	counts and first and last date per hour of a sorted
+	series, rolled up to days, months and years (the 'units'
+	of the match functions). count() on a rollup is answered
+	from the level nearest to 'by' instead of the raw dates.
+
+	only reducers with an 'ends' attribute (first, last,
+	average) can be answered from these summaries.
+
+	>>> r = Rollup(read("events.log", epochs=True))  # doctest: +SKIP
+	>>> r.save("events.rollup")                      # doctest: +SKIP
+	>>> count(Rollup.load("events.rollup"), matchmonth) # doctest: +SKIP
+	"""
+	def __init__(self, seq=(), units=("h", "D", "M", "Y")):
+		import numpy
+		self.dates = not isarray(seq)
+		if self.dates:
+			seq = numpy.array(map(to_epoch, seq), dtype="<i8")
+		data = numpy.sort(seq).astype("<i8")
+
+		self.units = sorted(units, key=UNITS.index)
+		self.levels = {}
+		if len(data) == 0:
+			for unit in self.units:
+				self.levels[unit] = (numpy.zeros(0, dtype="<i8"),) * 3
+			return
+
+		lo = numpy.r_[0, cutunit(data, self.units[0])]
+		hi = numpy.r_[lo[1:], len(data)] - 1
+		level = (hi-lo+1, data[lo], data[hi])
+		for unit in self.units:
+			level = self.rollup(level, unit)
+			self.levels[unit] = level
+
+	@staticmethod
+	def rollup(level, unit):
+		""" merges the buckets of 'level' to buckets of 'unit' """
+		import numpy
+		n, lows, highs = level
+		if len(n) == 0:
+			return level
+		lo = numpy.r_[0, cutunit(lows, unit)]
+		hi = numpy.r_[lo[1:], len(n)] - 1
+		return numpy.add.reduceat(n, lo), lows[lo], highs[hi]
+
+	def level(self, unit):
+		"""
+		returns the counts, first and last dates per bucket
+		of 'unit', rolled up from the nearest finer level.
+		"""
+		if unit in self.levels:
+			return self.levels[unit]
+		finer = [u for u in self.units if UNITS.index(u) < UNITS.index(unit)]
+		if unit not in UNITS or not finer:
+			raise ValueError("no rollup level for unit " + repr(unit))
+		return self.rollup(self.levels[finer[-1]], unit)
+
+	def count(self, by=matchday, which=average):
+		""" returns count(dates, by, which) """
+		if not hasattr(by, "unit"):
+			raise ValueError("rollups need a 'by' with a 'unit', like the match functions")
+		if not hasattr(which, "ends"):
+			raise ValueError("rollups need a 'which' with 'ends', like first, last and average")
+		n, lows, highs = self.level(by.unit)
+		x = which.ends(lows, highs)
+		if self.dates:
+			return map(from_epoch, x.tolist()), n.tolist()
+		return x, n
+
+	def save(self, filename):
+		""" stores the rollup as numpy .npz in 'filename' """
+		import numpy
+		arrays = {"dates": numpy.array(self.dates)}
+		for unit, level in self.levels.items():
+			for name, values in zip(("n", "lo", "hi"), level):
+				arrays[unit + "_" + name] = values
+		fd = open(filename, "wb")
+		numpy.savez(fd, **arrays)
+		fd.close()
+
+	@classmethod
+	def load(cls, filename):
+		""" returns a rollup stored by save() """
+		import numpy
+		arrays = numpy.load(filename)
+		rollup = cls.__new__(cls)
+		rollup.dates = bool(arrays["dates"])
+		rollup.levels = {}
+		for key in arrays.files:
+			if key.endswith("_n"):
+				unit = key[:-2]
+				rollup.levels[unit] = tuple(arrays[unit + "_" + name] for name in ("n", "lo", "hi"))
+		rollup.units = sorted(rollup.levels, key=UNITS.index)
+		return rollup
+
+def show():
+	""" shows all figures, see matplotlib.pyplot.show() """
+	import matplotlib.pyplot as plt
+	plt.show()
+
+def decimate(x, y, n):
+	"""
+	reduces (x, y) to at most 'n' points for plotting.
+	x gets divided into n/2-1 equally wide columns, of which
+	the points with smallest and largest y are kept, as well
+	as the first and last point. 'x' needs to be sorted.
+	returns two numpy arrays.
+	"""
+	import numpy
+	x, y = numpy.asarray(x), numpy.asarray(y)
+	if len(x) <= n:
+		return x, y
+
+	cols = max(1, n/2 - 1)
+	width = float(x[-1] - x[0]) or 1.
+	col = ((x - x[0]) * (cols / width)).astype(int).clip(0, cols-1)
+	order = numpy.lexsort((y, col))
+	cut = numpy.flatnonzero(numpy.diff(col[order])) + 1
+	lows = order[numpy.r_[0, cut]]
+	highs = order[numpy.r_[cut-1, len(x)-1]]
+	keep = numpy.unique(numpy.r_[0, lows, highs, len(x)-1])
+	return x[keep], y[keep]
+
 def baseplot(x, y, fmt='b.',
 	 figure=None, subplot=111, grid=True,
 	 sharex=None, sharey=None,
-	 xmajloc=AutoDateLocator(), xminloc=AutoDateLocator(), 
-	 xmajfmt=None, xminfmt=NullFormatter(), 
-         fmtxdata=DateFormatter("%F"), fmtydata=None,
+	 xmajloc=None, xminloc=None, 
+	 xmajfmt=None, xminfmt=None, 
+         fmtxdata=None, fmtydata=None,
 	 fill_between={"facecolor": "blue", "alpha": 0.08},
+	 maxpoints=None,
 	 **kwargs
 	 ):
 	"""
@@ -347,7 +1126,8 @@ def baseplot(x, y, fmt='b.',
 
 	Arguments
 	---------
-	x             x data (sequence of datetime objects)
+	x             x data (sequence of datetime objects
+	              or array of epoch seconds)
 	y             y data
 
 	fmt           plot format as understood by matplotlib.plot()
@@ -380,17 +1160,45 @@ def baseplot(x, y, fmt='b.',
 	              to matplotlib.axes.fill_between,
 		      default: {"facecolor": "blue", "alpha": 0.08}
 
+	maxpoints     if given, plot at most that many points of (x, y)
+	              as picked by decimate(), picking again from the
+		      visible data whenever the x limits change, 
+		      default: None
+
 	----------------------------------------------
 	Any other keyword argument is passed on 
 	to matplotlib.pyplot.plot_date().
 	----------------------------------------------
 	"""
+	import matplotlib.pyplot as plt
+	from matplotlib.ticker import NullFormatter, FormatStrFormatter
+	from matplotlib.dates import date2num, DateFormatter, \
+	     AutoDateFormatter, AutoDateLocator
+
+	xmajloc  = xmajloc or AutoDateLocator()
+	xminloc  = xminloc or AutoDateLocator()
+	xminfmt  = xminfmt or NullFormatter()
+	fmtxdata = fmtxdata or DateFormatter("%F")
+
+	if isarray(x):
+		x = epoch2num(x)
+
+	full = None
+	if maxpoints and len(x) > maxpoints:
+		import numpy
+		full = numpy.asarray(x if isarray(x) else date2num(x)), numpy.asarray(y)
+		x, y = decimate(full[0], full[1], maxpoints)
 
 	fig = plt.figure(figure)
 	ax = fig.add_subplot(subplot, sharex=sharex, sharey=sharey)
-	ax.plot_date(x, y, fmt, **kwargs)
+	lines = ax.plot_date(x, y, fmt, **kwargs)
 
-	if len(filter(lambda x: type(x) == int, y)) == len(y):
+	if isarray(y):
+		integers = y.dtype.kind in "iu"
+	else:
+		integers = len(filter(lambda x: type(x) == int, y)) == len(y)
+
+	if integers:
 		ax.set_ylim([0, max(y)+1])
 		fmtydata = fmtydata or FormatStrFormatter("%i")
 	else:
@@ -417,13 +1225,33 @@ def baseplot(x, y, fmt='b.',
 	ax.fmt_xdata = fmtxdata
 	ax.fmt_ydata = fmtydata
 
+	fills = []
 	if fill_between and len(fill_between) > 0:
-		ax.fill_between(x, y, **fill_between)
+		fills.append(ax.fill_between(x, y, **fill_between))
+
+	if full is not None:
+		def redecimate(ax):
+			lo, hi = full[0].searchsorted(ax.get_xlim())
+			lo, hi = max(0, lo-1), hi+1
+			x, y = decimate(full[0][lo:hi], full[1][lo:hi], maxpoints)
+			lines[0].set_data(x, y)
+			if len(fills) > 0:
+				fills.pop().remove()
+				fills.append(ax.fill_between(x, y, **fill_between))
+		ax.callbacks.connect("xlim_changed", redecimate)
 
 	fig.autofmt_xdate()
 
 	return fig, ax
 
+def middle(x):
+	"""
+	the median of dates or epochs 'x' as datetime object.
+	"""
+	if isarray(x):
+		return from_epoch(int(median(x)))
+	return median(x)
+
 def plot(x, y, 
 	 title="{start} -- {end}", tfmt="%e %b %y", 
 	 xlabel='', ylabel="Value",
@@ -455,10 +1283,16 @@ def plot(x, y,
 	Any other keyword argument is passed on to baseplot().
 	------------------------------------------------------
 	"""
+	import matplotlib.pyplot as plt
+	from matplotlib.dates import DateFormatter, AutoDateLocator, \
+	     HourLocator, DayLocator, WeekdayLocator, MonthLocator, MO
+
 	if len(x) <= 2:
 		print "not enough data to plot"
 		return
 	start, end = x[0], x[-1]
+	if isarray(x):
+		start, end = from_epoch(start), from_epoch(end)
 	span = end-start
 
 	if start == end:
@@ -473,7 +1307,7 @@ def plot(x, y,
 		       }
 		tfmt = "%a, %e %b %y"
 		title = "{start}"
-		start = median(x)
+		start = middle(x)
 
 	elif span.days <= 5:
 		kwds = {"xmajfmt": DateFormatter("%a %e"),
@@ -498,7 +1332,7 @@ def plot(x, y,
 		kwds = {"xminloc": WeekdayLocator(byweekday=MO)}
 		tfmt = "%Y"
 		title = "{start}"
-		start = median(x)
+		start = middle(x)
 
 	else:
 		kwds = {"xminloc": MonthLocator()}
@@ -524,15 +1358,87 @@ def plot(x, y,
 
 	return fig, ax
 
-def interpolated(x, y, win=5, kind='cubic', interpfmt='b-', **kwargs):
+def heatmap(matrix, start=None, 
+	    figure=None, subplot=111, grid=False, 
+	    cmap="Blues", colorbar=True, 
+	    title="", xlabel="", ylabel="",
+	    **kwargs):
+	"""
+	plots a matrix of counts from weekhours() or, given
+	the first day as 'start', from dayminutes(). 
+	returns matplotlib.figure and matplotlib.axes
+
+	Arguments
+	---------
+	matrix    rows of counts covering a day each
+	start     first day for rows of days, None for weekdays
+
+	figure    passed to matplotlib.figure, default: None
+	subplot   passed to matplotlib.subplot, default: 111
+	grid      boolean, turns grid on/off
+	cmap      matplotlib colormap, default: "Blues"
+	colorbar  boolean, adds a colorbar
+	title     string to set as title
+	xlabel    string to set as x-axis label
+	ylabel    string to set as y-axis label
+
+	---------------------------------------------
+	Any other keyword argument is passed on
+	to matplotlib.axes.imshow().
+	---------------------------------------------
+	"""
+	import matplotlib.pyplot as plt
+	from matplotlib.ticker import FixedLocator, FixedFormatter, \
+	     MultipleLocator, FormatStrFormatter
+	from matplotlib.dates import date2num, DateFormatter, AutoDateLocator
+
+	fig = plt.figure(figure)
+	ax = fig.add_subplot(subplot)
+	rows = len(matrix)
+
+	if start is None:
+		extent = [0, 24, rows-.5, -.5]
+		ax.yaxis.set_major_locator(FixedLocator(range(rows)))
+		ax.yaxis.set_major_formatter(FixedFormatter(WEEKDAYS[:rows]))
+		ax.fmt_ydata = lambda y: WEEKDAYS[int(round(y)) % 7]
+	else:
+		first = date2num(settime(start))
+		extent = [0, 24, first+rows, first]
+		ax.yaxis.set_major_locator(AutoDateLocator())
+		ax.yaxis.set_major_formatter(DateFormatter("%e %b %y"))
+		ax.fmt_ydata = DateFormatter("%F, %a")
+
+	image = ax.imshow(matrix, extent=extent, cmap=cmap, 
+	                  aspect="auto", interpolation="nearest", **kwargs)
+
+	ax.xaxis.set_major_locator(MultipleLocator(3))
+	ax.xaxis.set_minor_locator(MultipleLocator(1))
+	ax.xaxis.set_major_formatter(FormatStrFormatter("%i:00"))
+	ax.fmt_xdata = lambda x: "{h:02d}:{m:02d}".format(h=int(x), m=int(x%1*60))
+	ax.grid(grid)
+
+	if colorbar:
+		fig.colorbar(image, ax=ax)
+
+	plt.title(title)
+	plt.xlabel(xlabel)
+	plt.ylabel(ylabel)
+
+	return fig, ax
+
+def interpolated(x, y, win=5, kind='cubic', interpfmt='b-', start=None, end=None, 
+                 fit=None, **kwargs):
 	"""
 	plots (x, y) data points and an interpolated line on top.
 
-	'win' and 'kind' are options to intervalues().
+	'win', 'kind' and 'fit' are options to intervalues().
 	'interpfmt' is the plotting format string for the 
-	interpolation. **kwargs is passed to plot()
-	where 'fmt' is only applied to the data plot
-	and 'fill_between' only to the interpolated line.
+	interpolation. 'start' and 'end' limit both plots to 
+	a range of x, which is cheap to call again while zooming
+	when the same Interpolator is passed as 'fit'.
+	**kwargs is passed to plot() where 'fmt' is only applied 
+	to the data plot and 'fill_between' only to the 
+	interpolated line.
 	"""
 	fillbetween = kwargs.pop("fill_between", {"facecolor": "blue", "alpha": 0.1})
 	pointfmt    = kwargs.pop("fmt", "b.")
@@ -549,33 +1455,461 @@ def interpolated(x, y, win=5, kind='cubic', interpfmt='b-', **kwargs):
 		    "fill_between": fillbetween
 	 	    }
 
+	fit = fit or Interpolator(x, y, kind)
+	interx, intery = intervalues(x, y, win=win, kind=kind, start=start, end=end, fit=fit)
+	if start is not None or end is not None:
+		lo = 0 if start is None else fit.x.searchsorted(fit.num(start), "left")
+		hi = len(x) if end is None else fit.x.searchsorted(fit.num(end), "right")
+		x, y = x[lo:hi], y[lo:hi]
+
 	kwargs.update(pointkwds)
 	fa = plot(x, y, **kwargs)
 	kwargs.update(interkwds)
-	plot(*intervalues(x, y, win=win, kind=kind), **kwargs)
+	plot(interx, intery, **kwargs)
 	return fa
 
-def read(filename, start=None, end=None, fmt=DATETIME_FORMAT):
+class LivePlot(object):
+	"""
+	a baseplot() of (x, y) which follows growing data.
+
+	update() appends new points to the existing line and
+	fill and, as long as they fit into the axes, only blits
+	the axes instead of redrawing the whole figure. the fill
+	up to the second to last point is drawn once and kept 
+	in the background, so updates (like those of a Tail)
+	may still change the last point cheaply.
+
+	any keyword argument is passed on to baseplot().
+
+	>>> tail = Tail("events.log", by=matchhour)        # doctest: +SKIP
+	>>> tail.update()                                  # doctest: +SKIP
+	>>> live = LivePlot(*tail.count())                 # doctest: +SKIP
+	>>> while True:                                    # doctest: +SKIP
+	...	tail.update()
+	...	live.update(*tail.count())
+	...	live.pause(.2)
+	"""
+	def __init__(self, x, y, **kwargs):
+		import numpy
+		self.fillargs = kwargs.pop("fill_between", {"facecolor": "blue", "alpha": 0.08})
+		self.fig, self.ax = baseplot(x, y, fill_between=None, **kwargs)
+		self.canvas = self.fig.canvas
+		self.line = self.ax.lines[0]
+		self.line.set_animated(True)
+		self.x, self.y = self.nums(x), numpy.asarray(y)
+		self.fills, self.live, self.baked = [], None, 0
+		self.background = None
+		self.canvas.mpl_connect("draw_event", self.ondraw)
+		self.refill()
+
+	def nums(self, x):
+		""" matplotlib date numbers of dates or epochs 'x' """
+		import numpy
+		from matplotlib.dates import date2num
+		if isarray(x):
+			return epoch2num(x)
+		return numpy.asarray(date2num(x) if len(x) > 0 else [])
+
+	def fill(self, lo, hi):
+		""" fills below the points from 'lo' to 'hi' """
+		if not self.fillargs or hi - lo < 2:
+			return None
+		return self.ax.fill_between(self.x[lo:hi], self.y[lo:hi], **self.fillargs)
+
+	def refill(self):
+		"""
+		replaces all fills, those up to the second to last 
+		point are kept in the background, the rest is live.
+		"""
+		for fill in self.fills + [self.live]:
+			if fill is not None:
+				fill.remove()
+		self.baked = max(0, len(self.x)-1)
+		self.fills = filter(None, [self.fill(0, self.baked)])
+		self.live = self.fill(max(0, self.baked-1), len(self.x))
+		if self.live is not None:
+			self.live.set_animated(True)
+
+	def ondraw(self, event):
+		""" keeps the background of a full draw for blitting """
+		self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+		self.drawlive()
+
+	def drawlive(self):
+		""" draws the animated artists over the background """
+		if self.live is not None:
+			self.ax.draw_artist(self.live)
+		self.ax.draw_artist(self.line)
+		self.canvas.blit(self.ax.bbox)
+
+	def fits(self):
+		""" tells whether all points fit into the axes """
+		xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+		return len(self.x) == 0 or (self.x[0] >= xlim[0] and self.x[-1] <= xlim[1] 
+		                            and self.y.max() <= ylim[1])
+
+	def rescale(self):
+		""" sets the limits like baseplot() does """
+		if len(self.x) == 0:
+			return
+		top = self.y.max()
+		if self.y.dtype.kind in "iu":
+			self.ax.set_ylim([0, top+1])
+		else:
+			self.ax.set_ylim([0, top+top/10.])
+		# leave some room to grow into
+		lo, hi = self.ax.get_xlim()
+		self.ax.set_xlim([min(lo, self.x[0]), max(hi, self.x[-1] + (self.x[-1]-self.x[0])/10.)])
+
+	def redraw(self):
+		""" redraws the whole figure """
+		self.refill()
+		self.canvas.draw_idle()
+
+	def update(self, x, y):
+		"""
+		replaces the data by (x, y), which usually are the
+		data so far plus new points. redraws everything if
+		points before the last one changed or the new ones
+		don't fit, blits otherwise.
+		"""
+		import numpy
+		x, y = self.nums(x), numpy.asarray(y)
+		common = min(len(x), len(self.x))
+		changed = numpy.flatnonzero((x[:common] != self.x[:common]) | (y[:common] != self.y[:common]))
+		first = changed[0] if len(changed) > 0 else common
+		if len(x) < len(self.x):
+			first = min(first, len(x))
+
+		self.x, self.y = x, y
+		self.line.set_data(x, y)
+
+		if not self.fits():
+			self.rescale()
+			return self.redraw()
+		if first < self.baked or self.background is None or \
+		   not hasattr(self.canvas, "copy_from_bbox"):
+			return self.redraw()
+
+		self.canvas.restore_region(self.background)
+		baked = max(0, len(x)-1)
+		fill = self.fill(max(0, self.baked-1), baked)
+		if fill is not None:
+			self.ax.draw_artist(fill)
+			self.fills.append(fill)
+			self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+		self.baked = baked
+
+		if self.live is not None:
+			self.live.remove()
+		self.live = self.fill(max(0, baked-1), len(x))
+		if self.live is not None:
+			self.live.set_animated(True)
+		self.drawlive()
+
+	def pause(self, interval):
+		""" runs the GUI event loop for 'interval' seconds """
+		import matplotlib.pyplot as plt
+		plt.pause(interval)
+
+def renderone(spec):
+	"""
+	renders a single figure for render(), returns its
+	filename (None if nothing was plotted or it failed),
+	the seconds it took and the error, if any.
+	"""
+	import matplotlib.pyplot as plt
+	started = time()
+	spec = dict(spec)
+	filename = spec.pop("filename")
+	what = spec.pop("what", plot)
+	args = spec.pop("args", ())
+	savefig = spec.pop("savefig", {})
+
+	figures = set(plt.get_fignums())
+	try:
+		result = what(*args, **spec)
+		if result is None:
+			filename = None
+		else:
+			result[0].savefig(filename, **savefig)
+		error = None
+	except Exception as e:
+		filename, error = None, "{0}: {1}".format(type(e).__name__, e)
+	finally:
+		# whatever 'what' opened, even if it failed
+		for num in set(plt.get_fignums()) - figures:
+			plt.close(num)
+	return filename, time()-started, error
+
+def headless():
+	""" switches a render() worker to the Agg backend """
+	import matplotlib.pyplot as plt
+	plt.switch_backend("Agg")
+
+def render(specs, processes=None):
+	"""
+	renders figures to files without a display, spread 
+	over a pool of 'processes' (one per cpu by default).
+	processes=1 renders in this process, with its backend.
+	
+	each of 'specs' is a dictionary with the keys
+	 filename  file to save the figure to
+	 what      plotting function, default: plot
+	 args      its positional arguments, like (x, y)
+	 savefig   keyword arguments for Figure.savefig()
+	and any other keys are passed on to 'what'.
+
+	returns a list of the filenames (None where nothing
+	was plotted), the seconds each figure took and the 
+	error message where 'what' failed (None otherwise).
+	a failing figure doesn't stop the others.
+	"""
+	if processes == 1:
+		return map(renderone, specs)
+
+	from multiprocessing import Pool
+	pool = Pool(processes, initializer=headless)
+	try:
+		return pool.map(renderone, specs, chunksize=1)
+	finally:
+		pool.close()
+		pool.join()
+
+def parsedate(text):
+	"""
+	converts 'text' in DATE_FORMAT to a datetime object.
+	"""
+	if len(text) == 8 and text[2::3] == "//":
+		try:
+			return datetime(YEARS[text[0:2]], DIGITS[text[3:5]], DIGITS[text[6:8]])
+		except (KeyError, ValueError):
+			pass
+	return datetime.strptime(text, DATE_FORMAT)
+
+def parsedatetime(text):
+	"""
+	converts 'text' in DATETIME_FORMAT to a datetime object.
+	"""
+	if len(text) == 14 and text[2::3] == "// :":
+		try:
+			return datetime(YEARS[text[0:2]], DIGITS[text[3:5]], DIGITS[text[6:8]],
+			                DIGITS[text[9:11]], DIGITS[text[12:14]])
+		except (KeyError, ValueError):
+			pass
+	return datetime.strptime(text, DATETIME_FORMAT)
+
+def parser(fmt=DATETIME_FORMAT):
+	"""
+	returns a function converting strings formatted
+	with 'fmt' to datetime objects.
+
+	DATE_FORMAT and DATETIME_FORMAT are parsed by slicing
+	fixed offsets, other formats (or strings that don't 
+	fit the fixed layout) are handed to strptime.
+
+	>>> parser()("12/01/03 14:05")
+	datetime.datetime(2012, 1, 3, 14, 5)
+	>>> parser()("12/1/3 14:05")
+	datetime.datetime(2012, 1, 3, 14, 5)
+	"""
+	fast = {DATE_FORMAT: parsedate, DATETIME_FORMAT: parsedatetime}
+	return fast.get(fmt, lambda text: datetime.strptime(text, fmt))
+
+def formatdate(date):
+	"""
+	converts 'date' to a string in DATE_FORMAT.
+	"""
+	return "%02d/%02d/%02d" % (date.year % 100, date.month, date.day)
+
+def formatdatetime(date):
+	"""
+	converts 'date' to a string in DATETIME_FORMAT.
+	"""
+	return "%02d/%02d/%02d %02d:%02d" % (date.year % 100, date.month, date.day,
+	                                     date.hour, date.minute)
+
+def formatter(fmt=DATETIME_FORMAT):
+	"""
+	returns a function converting datetime objects to
+	strings formatted with 'fmt', the reverse of parser().
+
+	>>> formatter()(datetime(2012, 1, 3, 14, 5))
+	'12/01/03 14:05'
+	"""
+	fast = {DATE_FORMAT: formatdate, DATETIME_FORMAT: formatdatetime}
+	return fast.get(fmt, lambda date: datetime.strftime(date, fmt))
+
+def parselines(text, fmt=DATETIME_FORMAT):
 	"""
-	reads dates from 'filename' and returns 
-	datetime objects ranging from 'start' to 'end'.
+	parses the lines of 'text' using 'fmt' and returns
+	a sorted numpy array of epoch seconds.
 	"""
-	dates = list(open(filename))
-	dates = [x for x in dates if not x.isspace()]
-	dates = map(lambda x: x.strip(), dates)
-	dates = map(lambda x: datetime.strptime(x, fmt), dates)
-	dates.sort()
+	import numpy
+	dates = [x.strip() for x in text.splitlines() if not x.isspace() and x]
+	dates = map(to_epoch, map(parser(fmt), dates))
+	return numpy.sort(numpy.array(dates, dtype="<i8"))
 
-	start = start or dates[0]
-	end   = end or dates[-1]
+def checksum(filename, offset, n=1024):
+	"""
+	crc32 of the 'n' bytes of 'filename' before 'offset'.
+	"""
+	fd = open(filename, "rb")
+	fd.seek(max(0, offset-n))
+	crc = zlib.crc32(fd.read(min(n, offset)))
+	fd.close()
+	return crc
 
-	data = pick(dates, start, end)
+def opencache(filename, fmt, st):
+	"""
+	memory-maps the cache of 'filename' and returns the
+	cached epochs and the offset up to which 'filename' 
+	has been parsed. 'st' is the current os.stat of 'filename'.
+	returns an empty array and 0 for a missing or stale cache.
+	"""
+	import numpy
+	missing = (numpy.zeros(0, dtype="<i8"), 0)
+	try:
+		fd = open(filename + CACHE_SUFFIX, "rb")
+	except IOError:
+		return missing
+
+	try:
+		header = fd.read(CACHE_HEADER.size)
+		if len(header) != CACHE_HEADER.size:
+			return missing
+		magic, offset, size, mtime, n, crc, cfmt = CACHE_HEADER.unpack(header)
+		if magic != CACHE_MAGIC or cfmt.rstrip("\x00") != fmt:
+			return missing
+		if (size, mtime) != (st.st_size, st.st_mtime):
+			# only appending to 'filename' keeps the cache usable
+			if st.st_size <= size or checksum(filename, offset) != crc:
+				return missing
+		mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+	finally:
+		fd.close()
+
+	try:
+		return numpy.frombuffer(mm, dtype="<i8", count=n, offset=CACHE_DATA), offset
+	except ValueError:
+		# truncated
+		return missing
+
+def writecache(filename, fmt, epochs, offset, st):
+	"""
+	stores 'epochs' parsed from 'filename' up to 'offset'
+	in the cache next to 'filename'. returns False if the
+	cache can't be written, e.g. in a read-only directory.
+	"""
+	header = CACHE_HEADER.pack(CACHE_MAGIC, offset, st.st_size, st.st_mtime,
+	                           len(epochs), checksum(filename, offset), fmt)
+	tmp = filename + CACHE_SUFFIX + ".tmp"
+	try:
+		fd = open(tmp, "wb")
+		try:
+			fd.write(header.ljust(CACHE_DATA, "\x00"))
+			fd.write(epochs.astype("<i8").tostring())
+		finally:
+			fd.close()
+		os.rename(tmp, filename + CACHE_SUFFIX)
+	except (IOError, OSError):
+		if os.path.isfile(tmp):
+			os.remove(tmp)
+		return False
+	return True
+
+def readepochs(filename, fmt=DATETIME_FORMAT, cache=True):
+	"""
+	reads dates from 'filename' and returns them as
+	sorted numpy array of epoch seconds.
+
+	with 'cache', parsed dates are kept in a file next to
+	'filename' (see CACHE_SUFFIX), which is memory-mapped 
+	on later reads as long as 'filename' keeps its size 
+	and mtime. if 'filename' only grew, just the appended 
+	lines are parsed. a cache that can't be written is 
+	skipped, as is the cache for formats with %f, since 
+	epochs are whole seconds anyway.
+
+	binary files (see write()) are memory-mapped directly.
+	"""
+	import numpy
+	if isbinary(filename):
+		return readbinary(filename)
+	cache = cache and "%f" not in fmt
+	st = os.stat(filename)
+	if cache:
+		old, offset = opencache(filename, fmt, st)
+	else:
+		old, offset = numpy.zeros(0, dtype="<i8"), 0
+
+	fd = open(filename, "rb")
+	fd.seek(offset)
+	text = fd.read(st.st_size - offset)
+	fd.close()
+
+	# an incomplete last line is parsed, but not cached
+	complete = text.rfind("\n") + 1
+	tail = parselines(text[complete:], fmt)
+	new = parselines(text[:complete], fmt)
+
+	epochs = old
+	if len(new) > 0:
+		epochs = numpy.concatenate((old, new))
+		if len(old) > 0 and new[0] < old[-1]:
+			epochs.sort(kind="mergesort")
+	if cache and (len(new) > 0 or offset == 0):
+		writecache(filename, fmt, epochs, offset+complete, st)
+
+	if len(tail) > 0:
+		epochs = numpy.concatenate((epochs, tail))
+		epochs.sort(kind="mergesort")
+	return epochs
+
+def read(filename, start=None, end=None, fmt=DATETIME_FORMAT, cache=False, epochs=False):
+	"""
+	reads dates from 'filename' and returns a TimeSeries
+	of datetime objects ranging from 'start' to 'end'.
+
+	'cache' keeps the parsed dates next to 'filename'
+	for later calls, see readepochs(). the cache holds
+	whole seconds, so it's skipped for formats with %f.
+	'epochs' returns a numpy array of seconds since EPOCH 
+	instead, which the aggregation and plotting functions
+	take as well.
+
+	binary files written by write() are read without
+	parsing, whatever the 'fmt'.
+	"""
+	cache = cache and "%f" not in fmt
+	if epochs:
+		dates = readepochs(filename, fmt, cache)
+		date = lambda n: from_epoch(int(n))
+	elif cache or isbinary(filename):
+		dates = map(from_epoch, readepochs(filename, fmt).tolist())
+		dates = TimeSeries(dates, presorted=True)
+		date = lambda d: d
+	else:
+		dates = [x.strip() for x in open(filename) if not x.isspace()]
+		dates = TimeSeries(map(parser(fmt), dates))
+		date = lambda d: d
+
+	start = start or date(dates[0])
+	end   = end or date(dates[-1])
+
+	if epochs:
+		# sorted, so a slice keeps memory-mapped epochs mapped
+		lo = dates.searchsorted(to_epoch(start), "left")
+		hi = dates.searchsorted(to_epoch(end), "right")
+		data = dates[lo:hi]
+	else:
+		data = pick(dates, start, end)
 
 	if len(data) <= 2:
 		print "no data between", start, "and", end
 		return ([], [])
-	elif data[0] > start or data[-1] < end:
-		rstart, rend = data[0], data[-1]
+	elif date(data[0]) > start or date(data[-1]) < end:
+		rstart, rend = date(data[0]), date(data[-1])
 		diff = (rend-rstart) - (end-start)
 		if abs(diff.days) > 2:
 			diff = "{d:+.1f}d".format(d=to_days(diff))
@@ -588,14 +1922,351 @@ def read(filename, start=None, end=None, fmt=DATETIME_FORMAT):
 
 	return data
 
-def write(seq, filename, mode='w', fmt=DATETIME_FORMAT, lineend='\n'):
+def readpart(args):
+	"""
+	readepochs() for readmany(), keeps only the part
+	from 'start' to 'end' (either may be None).
+	"""
+	filename, start, end, fmt, cache = args
+	epochs = readepochs(filename, fmt, cache)
+	lo, hi = 0, len(epochs)
+	if start is not None:
+		lo = epochs.searchsorted(to_epoch(start), "left")
+	if end is not None:
+		hi = epochs.searchsorted(to_epoch(end), "right")
+	return epochs[lo:hi]
+
+def readmany(filenames, start=None, end=None, fmt=DATETIME_FORMAT,
+             cache=False, epochs=False, processes=None):
+	"""
+	reads dates from several files (like rotated logs)
+	and returns a single TimeSeries ranging from 'start' 
+	to 'end', or an epoch array with 'epochs' (see read()).
+
+	the files are parsed in a pool of 'processes' (one per
+	cpu by default) and the sorted results are merged.
+	"""
+	import numpy
+	jobs = [(filename, start, end, fmt, cache) for filename in filenames]
+	if processes == 1:
+		parts = map(readpart, jobs)
+	else:
+		from multiprocessing import Pool
+		pool = Pool(processes)
+		try:
+			parts = pool.map(readpart, jobs)
+		finally:
+			pool.close()
+			pool.join()
+
+	n = sum(map(len, parts))
+	print "read", n, "fnords from", len(filenames), "files"
+
+	dates = merge(*[part.tolist() for part in parts])
+	if epochs:
+		return numpy.fromiter(dates, dtype="<i8", count=n)
+	return TimeSeries(map(from_epoch, dates), presorted=True)
+
+def chunks(filename, fmt=DATETIME_FORMAT, blocksize=1<<24):
+	"""
+	reads dates from 'filename' in blocks of about 
+	'blocksize' bytes and yields each as numpy array of 
+	epoch seconds, sorted within the block. lines cut by
+	a block's end are carried over to the next.
+	"""
+	import numpy
+	if isbinary(filename):
+		epochs = readbinary(filename)
+		step = max(1, blocksize // 8)
+		for i in xrange(0, len(epochs), step):
+			yield epochs[i:i+step]
+		return
+
+	fd = open(filename, "rb")
+	rest = ""
+	while True:
+		block = fd.read(blocksize)
+		if not block:
+			break
+		text = rest + block
+		complete = text.rfind("\n") + 1
+		text, rest = text[:complete], text[complete:]
+		if text:
+			yield parselines(text, fmt)
+	fd.close()
+	if rest and not rest.isspace():
+		yield parselines(rest, fmt)
+
+def countfile(filename, by=matchday, which=average, fmt=DATETIME_FORMAT, blocksize=1<<24):
+	"""
+	count() of the dates in 'filename', streamed in blocks
+	(see chunks()), so it needs memory for the buckets only.
+	'by' needs a 'unit' and 'which' an 'ends' attribute,
+	like matchday and average. the file doesn't need to
+	be sorted. returns epoch arrays.
+	"""
+	import numpy
+	if not hasattr(by, "unit") or not hasattr(which, "ends"):
+		raise ValueError("countfile needs a 'by' with 'unit' and a 'which' with 'ends'")
+
+	totals = {}
+	for epochs in chunks(filename, fmt, blocksize):
+		if len(epochs) == 0:
+			continue
+		lo = numpy.r_[0, cuts(epochs, by)]
+		hi = numpy.r_[lo[1:], len(epochs)] - 1
+		keys = epochs[lo].astype("datetime64[s]").astype("datetime64[{0}]".format(by.unit))
+		# buckets cut by a block's end (or unsorted lines) meet again here
+		for key, n, first, last in zip(keys.astype("<i8").tolist(), (hi-lo+1).tolist(),
+		                               epochs[lo].tolist(), epochs[hi].tolist()):
+			if key in totals:
+				total = totals[key]
+				total[0] += n
+				total[1] = min(total[1], first)
+				total[2] = max(total[2], last)
+			else:
+				totals[key] = [n, first, last]
+
+	n, first, last = numpy.array([totals[k] for k in sorted(totals)], dtype="<i8").reshape(-1, 3).T
+	return which.ends(first, last), n
+
+def imeantimefile(filename, conv=to_minutes, which=average, interval=1, offset=0,
+                  fmt=DATETIME_FORMAT, blocksize=1<<24):
+	"""
+	meantime() of the dates in the sorted file 'filename',
+	streamed in blocks (see chunks()). yields the dates and
+	values of each block as arrays, the last date of a 
+	block is paired with the first of the next.
+	"""
+	import numpy
+	previous, seen = None, 0
+	for epochs in chunks(filename, fmt, blocksize):
+		if len(epochs) == 0:
+			continue
+		if previous is not None:
+			if epochs[0] < previous[0]:
+				raise ValueError(filename + " is not sorted")
+			epochs = numpy.concatenate((previous, epochs))
+			seen -= 1
+		# the first pair (of the file's positions i-1, i) to 
+		# compare in this block, counting from 'seen'
+		i = max(offset+1, seen+1)
+		i += -(i - offset - 1) % interval
+		if i - seen < len(epochs):
+			yield epochmeantime(epochs, conv, which, interval, i - seen - 1)
+		seen += len(epochs)
+		previous = epochs[-1:]
+
+	if seen == 1:
+		yield epochmeantime(previous, conv, which, interval, offset)
+
+def meantimefile(filename, conv=to_minutes, which=average, interval=1, offset=0,
+                 fmt=DATETIME_FORMAT, blocksize=1<<24):
+	"""
+	meantime() of the dates in the sorted file 'filename',
+	streamed in blocks, see imeantimefile(). only the 
+	results are kept in memory, as epoch arrays.
+	"""
+	import numpy
+	parts = list(imeantimefile(filename, conv, which, interval, offset, fmt, blocksize))
+	if len(parts) == 0:
+		return numpy.zeros(0, dtype="<i8"), numpy.zeros(0)
+	return tuple(map(numpy.concatenate, zip(*parts)))
+
+class Tail(object):
+	"""
+	follows a file of dates as it grows and keeps the 
+	results of count() and meantime() up to date. 
+
+	new dates cost O(1) each, as long as they come in
+	order. 'by' needs a 'key', like the match functions;
+	'which', 'conv', 'interval' and 'offset' are passed on
+	to count() and meantime() as usual.
+
+	>>> tail = Tail("events.log", by=matchhour)  # doctest: +SKIP
+	>>> for n in tail.follow():                   # doctest: +SKIP
+	...	plot(*tail.count())
+	"""
+	def __init__(self, filename, by=matchday, which=average, fmt=DATETIME_FORMAT,
+	             conv=to_minutes, interval=1, offset=0):
+		self.filename = filename
+		self.by = by
+		self.which = which
+		self.parse = parser(fmt)
+		self.conv = conv
+		self.interval = interval
+		self.offset = offset
+		self.reset()
+
+	def reset(self):
+		""" forgets everything read so far """
+		self.position = 0
+		self.dates = TimeSeries()
+		self.keys, self.counts, self.lows, self.highs = [], [], [], []
+		self.mdates, self.mvalues = [], []
+
+	def update(self):
+		"""
+		reads complete lines appended to 'filename' since the
+		last update and returns the number of new dates.
+		starts over if 'filename' shrunk.
+		"""
+		size = os.path.getsize(self.filename)
+		if size < self.position:
+			self.reset()
+
+		fd = open(self.filename, "rb")
+		fd.seek(self.position)
+		text = fd.read(size - self.position)
+		fd.close()
+
+		complete = text.rfind("\n") + 1
+		self.position += complete
+		lines = [x.strip() for x in text[:complete].splitlines() if not x.isspace() and x]
+		for date in map(self.parse, lines):
+			self.add(date)
+		return len(lines)
+
+	def follow(self, delay=1.):
+		"""
+		polls 'filename' every 'delay' seconds and yields
+		the number of new dates whenever there are some.
+		"""
+		while True:
+			n = self.update()
+			if n > 0:
+				yield n
+			else:
+				sleep(delay)
+
+	def add(self, date):
+		""" adds a single date to the aggregates """
+		i = bisect_right(self.dates, date)
+		self.dates.insert(i, date)
+
+		key = self.by.key(date)
+		j = bisect_left(self.keys, key)
+		if j == len(self.keys) or self.keys[j] != key:
+			for l, v in ((self.keys, key), (self.counts, 0), (self.lows, date), (self.highs, date)):
+				l.insert(j, v)
+		self.counts[j] += 1
+		self.lows[j] = min(self.lows[j], date)
+		self.highs[j] = max(self.highs[j], date)
+
+		# pairs of consecutive dates from position 'i' on have changed
+		n = len(xrange(self.offset+1, i, self.interval))
+		del self.mdates[n:]
+		del self.mvalues[n:]
+		for k in xrange(self.offset+1 + n*self.interval, len(self.dates), self.interval):
+			one, two = self.dates[k-1], self.dates[k]
+			self.mdates.append(self.which(one, two))
+			self.mvalues.append(self.conv(two-one))
+
+	def count(self):
+		""" returns count(dates, by, which) """
+		if not hasattr(self.which, "ends"):
+			return count(self.dates, self.by, self.which)
+		x = [self.which(lo, hi) for lo, hi in zip(self.lows, self.highs)]
+		return x, self.counts[:]
+
+	def meantime(self):
+		""" returns meantime(dates, conv, which, interval, offset) """
+		if len(self.dates) == 1:
+			return ([self.dates[0]], [0])
+		return self.mdates[:], self.mvalues[:]
+
+def isbinary(filename):
+	"""
+	tells whether 'filename' was written with write(binary=True).
+	"""
+	fd = open(filename, "rb")
+	magic = fd.read(len(BINARY_MAGIC))
+	fd.close()
+	return magic == BINARY_MAGIC
+
+def readbinary(filename):
+	"""
+	returns the epochs of a binary file (see write()) as
+	sorted numpy array, memory-mapped unless they had
+	to be sorted.
+	"""
+	import numpy
+	fd = open(filename, "rb")
+	magic, n = BINARY_HEADER.unpack(fd.read(BINARY_HEADER.size))
+	if n == 0:
+		fd.close()
+		return numpy.zeros(0, dtype="<i8")
+	mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+	fd.close()
+	epochs = numpy.frombuffer(mm, dtype="<i8", count=n, offset=BINARY_DATA)
+	if (epochs[1:] < epochs[:-1]).any():
+		epochs = numpy.sort(epochs, kind="mergesort")
+	return epochs
+
+def slices(seq, n):
+	"""
+	yields lists of up to 'n' items from any iterable 'seq',
+	or views of 'n' items from an array.
 	"""
-	converts datetime objects from 'seq' using 'fmt'
-	and writes them to 'filename'.
+	if isarray(seq):
+		for i in xrange(0, len(seq), n):
+			yield seq[i:i+n]
+		return
+	seq = iter(seq)
+	while True:
+		part = list(islice(seq, n))
+		if not part:
+			return
+		yield part
+
+def writebinary(seq, filename, mode='w', chunk=100000):
+	"""
+	writes dates or epochs from 'seq' as binary file, the
+	header keeps its count up to date when appending.
 	"""
+	import numpy
+	if 'a' in mode and os.path.exists(filename) and os.path.getsize(filename) > 0:
+		fd = open(filename, "r+b")
+		magic, n = BINARY_HEADER.unpack(fd.read(BINARY_HEADER.size))
+		if magic != BINARY_MAGIC:
+			fd.close()
+			raise ValueError(filename + " is not a binary pluto file")
+		fd.seek(BINARY_DATA + 8*n)
+		fd.truncate()
+	else:
+		fd, n = open(filename, "wb"), 0
+		fd.write(BINARY_HEADER.pack(BINARY_MAGIC, 0))
+
+	for part in slices(seq, chunk):
+		if not isarray(part):
+			part = numpy.array(map(to_epoch, part), dtype="<i8")
+		fd.write(part.astype("<i8").tostring())
+		n += len(part)
+
+	fd.seek(0)
+	fd.write(BINARY_HEADER.pack(BINARY_MAGIC, n))
+	fd.close()
+
+def write(seq, filename, mode='w', fmt=DATETIME_FORMAT, lineend='\n', 
+          binary=False, chunk=100000):
+	"""
+	converts datetime objects (or epochs) from 'seq' using
+	'fmt' and writes them to 'filename', 'chunk' lines at 
+	a time.
+
+	with 'binary', little-endian int64 epochs are written 
+	behind a small header instead (see BINARY_HEADER), 
+	which read() maps back into memory without parsing.
+	"""
+	if binary:
+		return writebinary(seq, filename, mode, chunk)
+
+	convert = formatter(fmt)
 	fd = open(filename, mode)
-	dates = [datetime.strftime(x, fmt) + lineend for x in seq]
-	fd.writelines(dates)
+	for part in slices(seq, chunk):
+		if isarray(part):
+			part = map(from_epoch, part.tolist())
+		fd.write(lineend.join(map(convert, part)) + lineend)
 	fd.close()
 
 def prind(x, y=None, unit='', fmt="{date} {value: 1.1f}{unit}"): 
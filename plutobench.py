@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+#
+# pluto benchmarks
+#
+# Times pluto functions on synthetic timestamp files
+# and reports throughput and peak memory, optionally
+# storing the results as JSON to compare later runs.
+#
+# plutobench.py --help
+#
+
+import os
+import sys
+import json
+import random
+import resource
+import platform
+import subprocess
+from multiprocessing import Process, Queue
+from Queue import Empty
+from argparse import ArgumentParser
+from os.path import dirname, abspath, join, exists
+from tempfile import gettempdir
+from time import time
+from datetime import datetime, timedelta
+
+import pluto
+
+SIZES = [10000, 100000, 1000000, 10000000]
+
+def dates(n, start=datetime(2012, 1, 1), step=timedelta(minutes=1)):
+	""" returns 'n' consecutive datetime objects """
+	return [start + i*step for i in xrange(n)]
+
+def timeit(func, *args, **kwargs):
+	""" calls func(*args, **kwargs), returns seconds and result """
+	t = time()
+	result = func(*args, **kwargs)
+	return time()-t, result
+
+def synthetic(n, directory=gettempdir(), chunk=100000):
+	"""
+	returns the name of a file with 'n' dates, 30 seconds
+	apart on average, which is created on first use.
+	"""
+	filename = join(directory, "plutobench-{n}.txt".format(n=n))
+	if exists(filename):
+		return filename
+
+	rand = random.Random(n)
+	date = datetime(2012, 1, 1)
+	open(filename + ".tmp", "w").close()
+	for i in xrange(0, n, chunk):
+		seq = []
+		for j in xrange(min(chunk, n-i)):
+			date += timedelta(seconds=int(rand.expovariate(1/30.)))
+			seq.append(date)
+		pluto.write(seq, filename + ".tmp", mode='a')
+	os.rename(filename + ".tmp", filename)
+	return filename
+
+def drawn(x, y):
+	""" baseplot() including drawing the figure """
+	import matplotlib.pyplot as plt
+	plt.switch_backend("Agg")
+	fig, ax = pluto.baseplot(x, y)
+	fig.canvas.draw()
+	plt.close(fig)
+
+# name, function of (filename, dates)
+BENCHMARKS = [
+	("read",        lambda f, seq: pluto.read(f)),
+	("buckets",     lambda f, seq: pluto.buckets(seq, pluto.matchday)),
+	("count",       lambda f, seq: pluto.count(seq, pluto.matchhour)),
+	("meantime",    lambda f, seq: pluto.meantime(seq)),
+	("combined",    lambda f, seq: pluto.combined(pluto.meantime, seq, pluto.matchday)),
+	("separately",  lambda f, seq: pluto.separately(pluto.meantime, seq, pluto.matchday)),
+	("intervalues", lambda f, seq: pluto.intervalues(*pluto.count(seq, pluto.matchhour))),
+	("baseplot",    lambda f, seq: drawn(*pluto.meantime(seq))),
+]
+
+def rss():
+	""" current resident memory of this process in kB """
+	pages = int(open("/proc/self/statm").read().split()[1])
+	return pages * resource.getpagesize() / 1024
+
+def measure(func, args, queue):
+	"""
+	runs in a forked process, puts seconds and peak kB
+	in 'queue', or None if 'func' failed.
+	"""
+	before = rss()
+	try:
+		seconds, result = timeit(func, *args)
+	except:
+		queue.put(None)
+		raise
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	queue.put((seconds, max(0, peak-before)))
+
+def isolated(func, *args):
+	"""
+	calls func(*args) in a forked process, so the peak
+	memory it needs is measured on its own.
+	returns seconds, peak memory in kB and None, or
+	None, None and what went wrong.
+	"""
+	queue = Queue()
+	proc = Process(target=measure, args=(func, args, queue))
+	proc.start()
+	result = None
+	while True:
+		try:
+			result = queue.get(timeout=1)
+			break
+		except Empty:
+			if not proc.is_alive():
+				# killed, e.g. by the OOM killer
+				try:
+					result = queue.get(timeout=1)
+				except Empty:
+					pass
+				break
+	proc.join()
+	if result is None:
+		return None, None, "failed (exit code {0})".format(proc.exitcode)
+	return result + (None,)
+
+def preload():
+	"""
+	imports what pluto imports on first use, so the forked
+	benchmarks don't time and measure that.
+	"""
+	import numpy
+	import scipy.interpolate
+	import matplotlib
+	matplotlib.use("Agg")
+	import matplotlib.pyplot
+
+def suite(sizes=SIZES, names=None):
+	""" runs BENCHMARKS on synthetic files of 'sizes', returns the results """
+	preload()
+	results = []
+	for n in sizes:
+		filename = synthetic(n)
+		seq = pluto.read(filename)
+		for name, func in BENCHMARKS:
+			if names and name not in names:
+				continue
+			seconds, peak, error = isolated(func, filename, seq)
+			if error is not None:
+				results.append({"name": name, "events": n, "error": error})
+				print "{name:12s} {n:>9d} {e}".format(name=name, n=n, e=error)
+				continue
+			results.append({"name": name, "events": n, "seconds": seconds,
+			                "throughput": n / seconds, "peak_mb": peak / 1024.})
+			print "{name:12s} {n:>9d} {s:9.3f}s {t:>12.0f}/s {m:9.1f}MB".format(
+			       name=name, n=n, s=seconds, t=n/seconds, m=peak/1024.)
+		del seq
+	return results
+
+def compare(results, baseline):
+	""" prints the speed of 'results' relative to 'baseline' results """
+	old = dict(((r["name"], r["events"]), r) for r in baseline)
+	for r in results:
+		b = old.get((r["name"], r["events"]))
+		if b is None or "error" in r or "error" in b:
+			continue
+		print "{name:12s} {n:>9d} {x:6.2f}x time {m:6.2f}x memory".format(
+		       name=r["name"], n=r["events"], x=r["seconds"]/b["seconds"],
+		       m=r["peak_mb"]/b["peak_mb"] if b["peak_mb"] else 0)
+
+def bench_parse(n, fmt=pluto.DATETIME_FORMAT):
+	""" strptime vs. pluto.parser() on 'n' lines """
+	lines = [d.strftime(fmt) for d in dates(n)]
+	slow, a = timeit(map, lambda x: datetime.strptime(x, fmt), lines)
+	fast, b = timeit(map, pluto.parser(fmt), lines)
+	assert a == b
+	print "parse {n} lines: strptime {s:.3f}s, parser {f:.3f}s ({x:.1f}x)".format(
+	       n=n, s=slow, f=fast, x=slow/fast)
+
+def bench_import():
+	""" times importing pluto, which must not load numpy, scipy or matplotlib """
+	code = ("import sys, time; t = time.time(); import pluto; "
+	        "print time.time()-t; "
+	        "print ' '.join(m for m in ('numpy', 'scipy', 'matplotlib') if m in sys.modules)")
+	out = subprocess.check_output([sys.executable, "-c", code], cwd=dirname(abspath(__file__)))
+	seconds, loaded = (out.split("\n") + [""])[:2]
+	print "import pluto: {s:.3f}s".format(s=float(seconds))
+	assert not loaded, "importing pluto loads " + loaded
+
+if __name__ == "__main__":
+	parser = ArgumentParser(description="Times pluto on synthetic timestamp files.")
+	parser.add_argument("-n", "--sizes", type=lambda s: map(int, s.split(",")), default=SIZES,
+	                    help="comma separated numbers of events (default: %(default)s)")
+	parser.add_argument("-b", "--bench", action="append", choices=[b[0] for b in BENCHMARKS],
+	                    help="run only this benchmark, may be repeated")
+	parser.add_argument("-o", "--output", help="write results to this JSON file")
+	parser.add_argument("-c", "--compare", help="compare with results from this JSON file")
+	args = parser.parse_args()
+
+	bench_import()
+	bench_parse(min(args.sizes))
+	bench_parse(min(args.sizes), pluto.DATE_FORMAT)
+	results = suite(args.sizes, args.bench)
+
+	if args.output:
+		report = {"date": datetime.now().isoformat(),
+		          "python": platform.python_version(),
+		          "results": results}
+		json.dump(report, open(args.output, "w"), indent=1)
+	if args.compare:
+		compare(results, json.load(open(args.compare))["results"])
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+#
+# pluto query service
+#
+# Keeps named series of dates in memory and answers
+# count, meantime and pick queries with JSON over
+# loopback HTTP, so they don't pay for read() again.
+#
+# plutoserve.py name=events.log other=other.log
+# curl 'localhost:8765/count?name=name&by=hour'
+#
+# only the files named on the command line are served.
+#
+# GET /load?name=..                     reloads a series from its file
+# GET /series                           lists loaded series
+# GET /count?name=..[&by=day&which=average&start=..&end=..]
+# GET /meantime?name=..[&conv=minutes&which=average&interval=1&offset=0&start=..&end=..]
+# GET /pick?name=..[&start=..&end=..]
+#
+# dates in queries are given as 2012-01-03T14:05:00,
+# 2012-01-03 or in pluto's DATETIME_FORMAT/DATE_FORMAT.
+#
+
+import json
+from argparse import ArgumentParser
+from datetime import datetime
+from urlparse import urlparse, parse_qs
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+import pluto
+
+BY = {"hour": pluto.matchhour, "day": pluto.matchday,
+      "month": pluto.matchmonth, "year": pluto.matchyear}
+
+WHICH = {"first": pluto.first, "last": pluto.last, "average": pluto.average,
+         "median": pluto.median, "p50": pluto.p50, "p95": pluto.p95, "p99": pluto.p99}
+
+CONV = {"seconds": pluto.to_seconds, "minutes": pluto.to_minutes,
+        "hours": pluto.to_hours, "days": pluto.to_days}
+
+FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d",
+           pluto.DATETIME_FORMAT, pluto.DATE_FORMAT]
+
+class QueryError(Exception):
+	""" a bad query, answered with 'status' """
+	def __init__(self, message, status=400):
+		Exception.__init__(self, message)
+		self.status = status
+
+class Series(object):
+	"""
+	a file of dates loaded as sorted epoch array,
+	with a Rollup built on first use.
+	"""
+	def __init__(self, filename, fmt=pluto.DATETIME_FORMAT):
+		self.filename = filename
+		self.fmt = fmt
+		self.epochs = pluto.readepochs(filename, fmt, cache=True)
+		self.rollup = None
+
+	def part(self, start=None, end=None):
+		""" the epochs from 'start' to 'end' (either may be None) """
+		lo, hi = 0, len(self.epochs)
+		if start is not None:
+			lo = self.epochs.searchsorted(pluto.to_epoch(start), "left")
+		if end is not None:
+			hi = self.epochs.searchsorted(pluto.to_epoch(end), "right")
+		return self.epochs[lo:hi]
+
+	def count(self, by, which, start=None, end=None):
+		""" count() of the part, from the rollup if possible """
+		if start is None and end is None and hasattr(which, "ends"):
+			if self.rollup is None:
+				self.rollup = pluto.Rollup(self.epochs)
+			return pluto.count(self.rollup, by, which)
+		part = self.part(start, end)
+		if len(part) == 0:
+			return part, part
+		return pluto.count(part, by, which)
+
+	def describe(self):
+		""" a summary for JSON """
+		summary = {"file": self.filename, "fmt": self.fmt, "events": len(self.epochs)}
+		if len(self.epochs) > 0:
+			summary["start"] = isodates(self.epochs[:1])[0]
+			summary["end"] = isodates(self.epochs[-1:])[0]
+		return summary
+
+def isodates(epochs):
+	""" epochs as list of ISO 8601 strings """
+	return [pluto.from_epoch(int(e)).isoformat() for e in epochs]
+
+def parsedate(text):
+	""" converts 'text' in one of FORMATS to a datetime object """
+	for fmt in FORMATS:
+		try:
+			return datetime.strptime(text, fmt)
+		except ValueError:
+			pass
+	raise QueryError("unknown date format: " + text)
+
+def choose(options, query, key, default):
+	""" looks up query[key] in 'options' """
+	name = query.get(key, default)
+	if name not in options:
+		raise QueryError("{k} must be one of {o}".format(k=key, o=", ".join(sorted(options))))
+	return options[name]
+
+def number(query, key, default, minimum=0):
+	""" query[key] as int of at least 'minimum' """
+	try:
+		value = int(query.get(key, default))
+	except ValueError:
+		raise QueryError(key + " must be an integer")
+	if value < minimum:
+		raise QueryError("{k} must be at least {m}".format(k=key, m=minimum))
+	return value
+
+class Service(object):
+	""" the loaded series and the queries on them """
+	def __init__(self):
+		self.series = {}
+		self.files = {}
+
+	def get(self, query):
+		""" the series named in 'query' """
+		if "name" not in query:
+			raise QueryError("missing name")
+		if query["name"] not in self.series:
+			raise QueryError("no series " + query["name"], 404)
+		return self.series[query["name"]]
+
+	def range(self, query):
+		""" start and end from 'query', None if missing """
+		return [parsedate(query[k]) if k in query else None for k in ("start", "end")]
+
+	def add(self, name, filename, fmt=pluto.DATETIME_FORMAT):
+		""" serves 'filename' as series 'name' and loads it """
+		self.files[name] = (filename, fmt)
+		self.series[name] = Series(filename, fmt)
+		return self.series[name].describe()
+
+	def load(self, query):
+		""" (re)loads the file of a series added on start """
+		if "name" not in query:
+			raise QueryError("missing name")
+		if query["name"] not in self.files:
+			raise QueryError("no series " + query["name"], 404)
+		filename, fmt = self.files[query["name"]]
+		try:
+			series = Series(filename, fmt)
+		except (IOError, OSError, ValueError):
+			# the error may quote the file, which isn't ours to show
+			raise QueryError("can't read series " + query["name"], 500)
+		self.series[query["name"]] = series
+		return series.describe()
+
+	def list(self, query):
+		""" describes every series """
+		return dict((name, s.describe()) for name, s in self.series.items())
+
+	def count(self, query):
+		""" count() of a series """
+		series = self.get(query)
+		by = choose(BY, query, "by", "day")
+		which = choose(WHICH, query, "which", "average")
+		x, y = series.count(by, which, *self.range(query))
+		return {"x": isodates(x), "y": y.tolist()}
+
+	def meantime(self, query):
+		""" meantime() of a series """
+		series = self.get(query)
+		x, y = pluto.meantime(series.part(*self.range(query)),
+		                      conv=choose(CONV, query, "conv", "minutes"),
+		                      which=choose(WHICH, query, "which", "average"),
+		                      interval=number(query, "interval", 1, minimum=1),
+		                      offset=number(query, "offset", 0))
+		return {"x": isodates(x), "y": y.tolist()}
+
+	def pick(self, query):
+		""" the dates of a series """
+		series = self.get(query)
+		return {"x": isodates(series.part(*self.range(query)))}
+
+	def answer(self, path, query):
+		""" returns the JSON-able answer for 'path' """
+		handlers = {"/load": self.load, "/series": self.list, "/count": self.count,
+		            "/meantime": self.meantime, "/pick": self.pick}
+		if path not in handlers:
+			raise QueryError("unknown query " + path, 404)
+		return handlers[path](query)
+
+class Handler(BaseHTTPRequestHandler):
+	""" answers GET requests with JSON from the server's Service """
+	def do_GET(self):
+		url = urlparse(self.path)
+		query = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+		try:
+			status, result = 200, self.server.service.answer(url.path, query)
+		except QueryError as e:
+			status, result = e.status, {"error": str(e)}
+		except Exception as e:
+			self.log_error("%s failed: %r", self.path, e)
+			status, result = 500, {"error": repr(e)}
+		body = json.dumps(result)
+		self.send_response(status)
+		self.send_header('Content-type', 'application/json')
+		self.send_header('Content-length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+def main():
+	parser = ArgumentParser(description="Answers pluto queries on series kept in memory.")
+	parser.add_argument("series", nargs="*", metavar="name=file",
+	                    help="series to load on start")
+	parser.add_argument("-f", "--fmt", default=pluto.DATETIME_FORMAT,
+	                    help="date format of the files (default: %(default)s)")
+	parser.add_argument("-p", "--port", type=int, default=8765,
+	                    help="port on localhost (default: %(default)s)")
+	args = parser.parse_args()
+
+	server = HTTPServer(("127.0.0.1", args.port), Handler)
+	server.service = Service()
+	for arg in args.series:
+		name, filename = arg.split("=", 1)
+		print name, server.service.add(name, filename, args.fmt)
+	server.serve_forever()
+
+if __name__ == "__main__":
+	main()